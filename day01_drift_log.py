@@ -0,0 +1,46 @@
+"""
+Shared loader for the day 1 frequency drift logs.
+
+The logs can be far larger than the puzzle input, so the file is memory-mapped
+and parsed block by block straight into a packed array of signed 64-bit ints
+instead of going through a list of lines.
+"""
+from array import array
+from itertools import accumulate
+from typing import Sequence
+import mmap
+
+BLOCK_SIZE = 1 << 20
+
+
+def load_drift_log(path: str, block_size: int = BLOCK_SIZE) -> array:
+    changes = array('q')
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return changes
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            carry = b''
+            for start in range(0, len(mm), block_size):
+                block = carry + mm[start:start + block_size]
+                tokens = block.split()
+                carry = b''
+                # the last token may continue in the next block
+                if tokens and not block[-1:].isspace():
+                    carry = tokens.pop()
+                changes.extend(map(int, tokens))
+            if carry:
+                changes.append(int(carry))
+    return changes
+
+
+def drift_total(changes: Sequence[int]) -> int:
+    return sum(changes)
+
+
+def prefix_frequencies(changes: Sequence[int]) -> array:
+    # frequencies reached during the first pass, before each change is applied
+    if not changes:
+        return array('q')
+    frequencies = array('q', accumulate(changes[:-1]))
+    frequencies.insert(0, 0)
+    return frequencies
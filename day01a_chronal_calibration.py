@@ -26,8 +26,8 @@ Here are other example situations:
 Starting with a frequency of zero, what is the resulting frequency after all of the changes in frequency have been applied?
 """
 
+from day01_drift_log import load_drift_log, drift_total
 
-with open("models/day01.txt") as f:
-    numbers = [int(line) for line in f.readlines()]
+numbers = load_drift_log('models/day01.txt')
 
-print(sum(numbers))
\ No newline at end of file
+print(drift_total(numbers))
\ No newline at end of file
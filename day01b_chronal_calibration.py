@@ -20,13 +20,12 @@ Here are other examples:
 +7, +7, -2, -7, -4 first reaches 14 twice.
 What is the first frequency your device reaches twice?
 """
-from typing import Iterator
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple, Union
+from array import array
+from bisect import bisect_left, insort
+from day01_drift_log import load_drift_log, drift_total, prefix_frequencies
 
-with open('models/day01.txt') as f:
-    numbers = [int(line.strip()) for line in f.readlines()]
-
-
-def all_frequencies() -> Iterator[int]:
+def all_frequencies(numbers: Sequence[int]) -> Iterator[int]:
     frequency = 0
     while True:
         for number in numbers:
@@ -34,13 +33,241 @@ def all_frequencies() -> Iterator[int]:
             frequency += number
 
 
-def first_repeat_frequency():
-    reached_frenquencies = set()
+class BitmapSeenSet:
+    # one bit per frequency between low and high, grown on demand because
+    # later passes drift outside the first-pass range
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.bits = bytearray(((high - low) >> 3) + 1)
+        self.probes = 0
+        self.peak_bytes = len(self.bits)
 
-    for frequency in all_frequencies():
-        if frequency in reached_frenquencies:
-            return frequency
+    def _grow(self, frequency: int):
+        extra = max(len(self.bits), abs(frequency - self.low) >> 3) + 1
+        if frequency < self.low:
+            self.bits = bytearray(extra) + self.bits
+            self.low -= extra << 3
         else:
-            reached_frenquencies.add(frequency)
+            self.bits.extend(bytearray(extra))
+        self.peak_bytes = max(self.peak_bytes, len(self.bits))
+
+    def add(self, frequency: int) -> bool:
+        offset = frequency - self.low
+        while offset < 0 or offset >= len(self.bits) << 3:
+            self._grow(frequency)
+            offset = frequency - self.low
+        self.probes += 1
+        mask = 1 << (offset & 7)
+        if self.bits[offset >> 3] & mask:
+            return True
+        self.bits[offset >> 3] |= mask
+        return False
+
+
+EMPTY_SLOT = -(1 << 63)
+
+
+class HashSeenSet:
+    # open addressing with linear probing over a packed int64 array
+    def __init__(self, capacity_bits: int = 10):
+        self.capacity_bits = capacity_bits
+        self.slots = array('q', [EMPTY_SLOT]) * (1 << capacity_bits)
+        self.size = 0
+        self.has_empty_slot_value = False
+        self.probes = 0
+        self.peak_bytes = len(self.slots) * self.slots.itemsize
+
+    def _slot(self, frequency: int) -> int:
+        return ((frequency * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - self.capacity_bits)
+
+    def _resize(self):
+        old_slots = self.slots
+        self.capacity_bits += 1
+        self.slots = array('q', [EMPTY_SLOT]) * (1 << self.capacity_bits)
+        self.peak_bytes = max(self.peak_bytes, (len(old_slots) + len(self.slots)) * self.slots.itemsize)
+        self.size = 0
+        for frequency in old_slots:
+            if frequency != EMPTY_SLOT:
+                self._insert(frequency)
+
+    def _insert(self, frequency: int) -> bool:
+        mask = len(self.slots) - 1
+        index = self._slot(frequency)
+        while True:
+            self.probes += 1
+            slot = self.slots[index]
+            if slot == frequency:
+                return True
+            if slot == EMPTY_SLOT:
+                break
+            index = (index + 1) & mask
+        self.slots[index] = frequency
+        self.size += 1
+        return False
+
+    def add(self, frequency: int) -> bool:
+        if frequency == EMPTY_SLOT:
+            seen, self.has_empty_slot_value = self.has_empty_slot_value, True
+            return seen
+        if self._insert(frequency):
+            return True
+        if self.size * 2 > len(self.slots):
+            self._resize()
+        return False
+
+
+DENSE_SPREAD_FACTOR = 64
+
+
+def make_seen_set(numbers: Sequence[int]) -> Union[BitmapSeenSet, HashSeenSet]:
+    prefixes = prefix_frequencies(numbers)
+    low, high = min(prefixes), max(prefixes)
+    if high - low <= DENSE_SPREAD_FACTOR * len(prefixes):
+        return BitmapSeenSet(low, high)
+    return HashSeenSet()
+
+
+def first_repeat_frequency(numbers: Sequence[int], seen: Union[BitmapSeenSet, HashSeenSet, None] = None):
+    # only terminates if some frequency repeats; check solve_first_repeat first
+    reached_frenquencies = seen if seen is not None else make_seen_set(numbers)
+
+    for frequency in all_frequencies(numbers):
+        if reached_frenquencies.add(frequency):
+            return frequency
+
+
+
+def solve_first_repeat(numbers: Sequence[int]) -> Optional[int]:
+    prefixes = prefix_frequencies(numbers)
+    total = drift_total(numbers)
+
+    first_pass = set()
+    for frequency in prefixes:
+        if frequency in first_pass:
+            return frequency
+        first_pass.add(frequency)
+    if total == 0:
+        return 0
+
+    # during pass k the device sits at prefixes[i] + k * total, so only
+    # prefix sums sharing a residue modulo the total can ever meet again
+    groups: Dict[int, List[int]] = {}
+    for index, frequency in enumerate(prefixes):
+        groups.setdefault(frequency % total, []).append(index)
+
+    best = None
+    for indices in groups.values():
+        indices.sort(key=lambda index: prefixes[index], reverse=total < 0)
+        for index, next_index in zip(indices, indices[1:]):
+            passes = (prefixes[next_index] - prefixes[index]) // total
+            # index < len(numbers), so fewer passes always wins
+            candidate = (passes, index, prefixes[next_index])
+            if best is None or candidate < best:
+                best = candidate
+    if best is None:
+        return None
+    return best[2]
+
+
+class IncrementalCalibrator:
+    # keeps the state of solve_first_repeat so that appending a batch only
+    # touches the new prefix sums. The residue buckets depend on the per-pass
+    # total, so a batch that shifts it marks them stale instead of rebuilding;
+    # the next first_repeat query regroups once. What survives a change of
+    # total is the value-sorted order of all prefix sums: the rebuild sorts
+    # only the new tail, timsort then merges the two sorted runs, and a
+    # stable pass over that order yields every residue bucket already sorted.
+    def __init__(self, changes: Sequence[int] = ()):
+        self.total = 0
+        self.prefixes = array('q')
+        self.first_index: Dict[int, int] = {}
+        self.first_pass_repeat: Optional[int] = None
+        self.low = self.high = 0
+        self.ordered: List[int] = []
+        self.unordered: List[int] = []
+        self.buckets: Dict[int, List[int]] = {}
+        self.bucket_total: Optional[int] = None
+        self.best: Optional[Tuple[int, int, int]] = None
+        self.append(changes)
+
+    def append(self, changes: Sequence[int]):
+        start = len(self.prefixes)
+        for change in changes:
+            self.prefixes.append(self.total)
+            self.total += change
+        if self.total != self.bucket_total:
+            # a later batch may bring the total back, but these prefix sums
+            # never made it into the buckets
+            self.bucket_total = None
+        if self.first_pass_repeat is not None:
+            return
+        for index in range(start, len(self.prefixes)):
+            frequency = self.prefixes[index]
+            if frequency in self.first_index:
+                self.first_pass_repeat = frequency
+                self.ordered = []
+                self.unordered = []
+                self.buckets.clear()
+                return
+            self.first_index[frequency] = index
+            self.low = min(self.low, frequency)
+            self.high = max(self.high, frequency)
+            self.unordered.append(frequency)
+            if self.bucket_total == self.total and self.total != 0:
+                self._insert(frequency)
+
+    def _rebuild(self):
+        self.unordered.sort()
+        self.ordered.extend(self.unordered)
+        self.unordered = []
+        self.ordered.sort()
+        self.buckets.clear()
+        self.best = None
+        for frequency in self.ordered:
+            self.buckets.setdefault(frequency % self.total, []).append(frequency)
+        for bucket in self.buckets.values():
+            for lower, upper in zip(bucket, bucket[1:]):
+                self._consider(lower, upper)
+        self.bucket_total = self.total
+
+    def _insert(self, frequency: int):
+        bucket = self.buckets.setdefault(frequency % self.total, [])
+        position = bisect_left(bucket, frequency)
+        if position > 0:
+            self._consider(bucket[position - 1], frequency)
+        if position < len(bucket):
+            self._consider(frequency, bucket[position])
+        insort(bucket, frequency)
+
+    def _consider(self, lower: int, upper: int):
+        start, end = (lower, upper) if self.total > 0 else (upper, lower)
+        candidate = ((end - start) // self.total, self.first_index[start], end)
+        if self.best is None or candidate < self.best:
+            self.best = candidate
+
+    @property
+    def first_repeat(self) -> Optional[int]:
+        if self.first_pass_repeat is not None:
+            return self.first_pass_repeat
+        if self.total == 0:
+            return 0
+        # two prefix sums can only meet if they are at least one total apart
+        if self.high - self.low < abs(self.total):
+            return None
+        if self.bucket_total != self.total:
+            self._rebuild()
+        if self.best is None:
+            return None
+        return self.best[2]
+
+
+if __name__ == '__main__':
+    numbers = load_drift_log('models/day01.txt')
+
+    result = solve_first_repeat(numbers)
+    print('never repeats' if result is None else result)
 
-print(first_repeat_frequency())
\ No newline at end of file
+    if result is not None:
+        seen = make_seen_set(numbers)
+        print(first_repeat_frequency(numbers, seen), type(seen).__name__,
+              'peak bytes:', seen.peak_bytes, 'probes:', seen.probes)
@@ -22,34 +22,75 @@ Of these box IDs, four of them contain a letter which appears exactly twice, and
 
 What is the checksum for your list of box IDs?
 """
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from collections import Counter, deque
+from multiprocessing import Pool
+import os
 
-with open('models/day02.txt') as f:
-    box_ids = [line.strip() for line in f.readlines()]
+def letter_multiplicities(box_id: str) -> Set[int]:
+    return set(Counter(box_id).values())
 
 def two_letters(box_id: str):
-    counts = []
-    for letter in box_id:
-        counts.append(box_id.count(letter))
-    if 2 in counts:
-        return 1
-    else:
-        return 0
+    return int(2 in letter_multiplicities(box_id))
 
 def three_letters(box_id: str):
-    counts = []
-    for letter in box_id:
-        counts.append(box_id.count(letter))
-    if 3 in counts:
-        return 1
-    else:
-        return 0
-
-def check_sum():
-    twos = 0
-    threes = 0
+    return int(3 in letter_multiplicities(box_id))
+
+def count_multiplicities(box_ids: Iterable[str], multiplicities: Sequence[int] = (2, 3)) -> Dict[int, int]:
+    counts = dict.fromkeys(multiplicities, 0)
     for box_id in box_ids:
-        twos += two_letters(box_id)
-        threes += three_letters(box_id)
-    return twos * threes
+        for multiplicity in letter_multiplicities(box_id).intersection(counts):
+            counts[multiplicity] += 1
+    return counts
+
+def check_sum(box_ids: List[str], multiplicities: Sequence[int] = (2, 3)):
+    result = 1
+    for count in count_multiplicities(box_ids, multiplicities).values():
+        result *= count
+    return result
+
+CHUNK_SIZE = 1 << 20
+
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    # fixed-size reads, cut back to the last newline so no ID is split
+    with open(path, 'rb') as f:
+        rest = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk = rest + chunk
+            cut = chunk.rfind(b'\n') + 1
+            rest = chunk[cut:]
+            yield chunk[:cut]
+        if rest:
+            yield rest
+
+def _count_chunk(task: Tuple[bytes, Sequence[int]]) -> Dict[int, int]:
+    chunk, multiplicities = task
+    box_ids = (line.strip() for line in chunk.decode().splitlines())
+    return count_multiplicities((box_id for box_id in box_ids if box_id), multiplicities)
+
+def stream_check_sum(path: str, multiplicities: Sequence[int] = (2, 3), processes: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    totals = Counter(dict.fromkeys(multiplicities, 0))
+    window = 2 * (processes or os.cpu_count() or 1)
+    with Pool(processes) as pool:
+        # only a bounded number of chunks are in flight at any time
+        pending: Deque = deque()
+        for chunk in read_chunks(path, chunk_size):
+            pending.append(pool.apply_async(_count_chunk, ((chunk, multiplicities),)))
+            if len(pending) >= window:
+                totals.update(pending.popleft().get())
+        while pending:
+            totals.update(pending.popleft().get())
+    result = 1
+    for count in totals.values():
+        result *= count
+    return result
+
+if __name__ == '__main__':
+    with open('models/day02.txt') as f:
+        box_ids = [line.strip() for line in f.readlines()]
 
-print(check_sum())
\ No newline at end of file
+    print(check_sum(box_ids))
+    print(stream_check_sum('models/day02.txt'))
\ No newline at end of file
@@ -14,27 +14,24 @@ The IDs abcde and axcye are close, but they differ by two characters (the second
 
 What letters are common between the two correct box IDs? (In the example above, this is found by removing the differing character from either ID, producing fgij.)
 """
-from typing import List
+from typing import List, Tuple, Dict, Optional
 from collections import Counter
+from multiprocessing import Pool
+import os
 
 with open('models/day02.txt') as f:
     box_ids: List[str] = [line.strip() for line in f.readlines()]
 
 
-def compare_two_strings(str1: str, str2: str) -> str:
-    LENGTH = len(str1)
+def different_positions(str1: str, str2: str) -> List[int]:
+    return [i for i in range(len(str1)) if str1[i] != str2[i]]
 
-    same_letter_num = 0
-    different_letter_pos = 0
 
-    for i in range(LENGTH):
-        if str1[i] == str2[i]:
-            same_letter_num += 1
-        else:
-            different_letter_pos = i
+def compare_two_strings(str1: str, str2: str) -> str:
+    positions = different_positions(str1, str2)
 
-    if same_letter_num == LENGTH - 1:
-        return str1[:different_letter_pos] + str1[different_letter_pos + 1:]
+    if len(positions) == 1:
+        return str1[:positions[0]] + str1[positions[0] + 1:]
 
 
 def find_the_box(box_ids: List[str]):
@@ -45,4 +42,71 @@ def find_the_box(box_ids: List[str]):
                 return ret
 
 
-print(find_the_box(box_ids))
+def find_all_boxes(box_ids: List[str]) -> List[Tuple[str, str, str]]:
+    # IDs differing in exactly one position share exactly one key: that
+    # position together with the ID with that position masked out
+    index: Dict[Tuple[int, str], List[str]] = {}
+    for box_id in dict.fromkeys(box_ids):
+        for i in range(len(box_id)):
+            index.setdefault((i, box_id[:i] + box_id[i + 1:]), []).append(box_id)
+
+    pairs = []
+    for (_, common), ids in index.items():
+        for i in range(len(ids)):
+            for j in range(i + 1, len(ids)):
+                pairs.append((ids[i], ids[j], common))
+    return pairs
+
+
+def block_bounds(length: int, k: int) -> List[Tuple[int, int]]:
+    # by pigeonhole, two IDs with at most k mismatches agree on at least one
+    # of k + 1 blocks
+    return [(length * b // (k + 1), length * (b + 1) // (k + 1)) for b in range(k + 1)]
+
+
+_search_ids: List[str] = []
+
+
+def _init_search(box_ids: List[str]):
+    global _search_ids
+    _search_ids = box_ids
+
+
+def _search_shard(shard: Tuple[int, int, List[List[int]]]) -> List[Tuple[int, int, List[int]]]:
+    block, k, buckets = shard
+    found = []
+    for indices in buckets:
+        earlier_blocks = block_bounds(len(_search_ids[indices[0]]), k)[:block]
+        for a in range(len(indices)):
+            for b in range(a + 1, len(indices)):
+                i, j = indices[a], indices[b]
+                str1, str2 = _search_ids[i], _search_ids[j]
+                # a pair is reported only by the first block it agrees on
+                if any(str1[start:end] == str2[start:end] for start, end in earlier_blocks):
+                    continue
+                positions = different_positions(str1, str2)
+                if len(positions) <= k:
+                    found.append((i, j, positions))
+    return found
+
+
+def search_similar_boxes(box_ids: List[str], k: int, processes: Optional[int] = None) -> List[Tuple[str, str, List[int]]]:
+    # every ID is hashed once per block here; the workers only verify the
+    # candidate pairs of the buckets they are handed
+    parts = processes or os.cpu_count() or 1
+    bounds = {length: block_bounds(length, k) for length in {len(box_id) for box_id in box_ids}}
+    shards: List[Tuple[int, int, List[List[int]]]] = []
+    for block in range(k + 1):
+        buckets: Dict[Tuple[int, str], List[int]] = {}
+        for index, box_id in enumerate(box_ids):
+            start, end = bounds[len(box_id)][block]
+            buckets.setdefault((len(box_id), box_id[start:end]), []).append(index)
+        candidates = [indices for indices in buckets.values() if len(indices) > 1]
+        shards.extend((block, k, candidates[part::parts]) for part in range(parts))
+    with Pool(processes, initializer=_init_search, initargs=(box_ids,)) as pool:
+        results = pool.map(_search_shard, shards)
+    return [(box_ids[i], box_ids[j], positions) for found in results for i, j, positions in found]
+
+
+if __name__ == '__main__':
+    print(find_all_boxes(box_ids)[0][2])
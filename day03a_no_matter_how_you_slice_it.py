@@ -40,8 +40,9 @@ The four square inches marked with X are claimed by both 1 and 2. (Claim 3, whil
 
 If the Elves all proceed with their own plans, none of them will have enough fabric. How many square inches of fabric are within two or more claims?
 """
-from typing import List, NamedTuple
-from collections import Counter
+from typing import List, NamedTuple, Dict, Tuple, Set, Optional
+from itertools import accumulate
+from array import array
 import re
 
 with open('models/day03.txt') as f:
@@ -76,12 +77,211 @@ def get_rectangles_from_claims(claims: List[str]) -> List[Rectangle]:
     return recs
 
 
+class CoverageGrid:
+    # each claim touches four corners of a 2D difference array; prefix sums
+    # turn it into the per-inch coverage, and a summed-area table over the
+    # coverage answers per-claim window sums in O(1)
+    def __init__(self, rectangles: List[Rectangle]):
+        self.width = max((r.x + r.width for r in rectangles), default=0)
+        self.height = max((r.y + r.height for r in rectangles), default=0)
+        diff = [array('i', [0]) * (self.width + 1) for _ in range(self.height + 1)]
+        for r in rectangles:
+            diff[r.y][r.x] += 1
+            diff[r.y][r.x + r.width] -= 1
+            diff[r.y + r.height][r.x] -= 1
+            diff[r.y + r.height][r.x + r.width] += 1
+
+        self.coverage: List[array] = []
+        self.summed: List[array] = [array('q', [0]) * (self.width + 1)]
+        running = array('i', [0]) * self.width
+        for y in range(self.height):
+            running = array('i', map(sum, zip(running, accumulate(diff[y][:self.width]))))
+            self.coverage.append(running)
+            row_sums = accumulate(running)
+            self.summed.append(array('q', [0]) + array('q', map(sum, zip(self.summed[-1][1:], row_sums))))
+
+    def overlap_area(self) -> int:
+        return sum(1 for row in self.coverage for count in row if count >= 2)
+
+    def window_sum(self, x: int, y: int, width: int, height: int) -> int:
+        summed = self.summed
+        return (summed[y + height][x + width] - summed[y][x + width]
+                - summed[y + height][x] + summed[y][x])
+
+    def intact_claims(self, rectangles: List[Rectangle]) -> List[int]:
+        # every inch of a claim is covered at least once, so it is intact
+        # exactly when its window sums to its own area
+        return [r.claim_id for r in rectangles
+                if self.window_sum(r.x, r.y, r.width, r.height) == r.width * r.height]
+
+
+class OverlapSegmentTree:
+    # segment tree over compressed y coordinates keeping, per node, how many
+    # claims fully cover it and how much of its span is covered once / twice
+    def __init__(self, ys: List[int]):
+        self.ys = ys
+        size = 4 * max(len(ys) - 1, 1)
+        self.cover = [0] * size
+        self.once = [0] * size
+        self.twice = [0] * size
+
+    def update(self, y1: int, y2: int, delta: int, node: int = 1, lo: int = 0, hi: Optional[int] = None):
+        if hi is None:
+            hi = len(self.ys) - 1
+        if y2 <= self.ys[lo] or self.ys[hi] <= y1:
+            return
+        if y1 <= self.ys[lo] and self.ys[hi] <= y2:
+            self.cover[node] += delta
+        else:
+            mid = (lo + hi) // 2
+            self.update(y1, y2, delta, 2 * node, lo, mid)
+            self.update(y1, y2, delta, 2 * node + 1, mid, hi)
+        self._pull(node, lo, hi)
+
+    def _pull(self, node: int, lo: int, hi: int):
+        span = self.ys[hi] - self.ys[lo]
+        leaf = hi - lo == 1
+        children_once = 0 if leaf else self.once[2 * node] + self.once[2 * node + 1]
+        children_twice = 0 if leaf else self.twice[2 * node] + self.twice[2 * node + 1]
+        if self.cover[node] >= 2:
+            self.once[node] = self.twice[node] = span
+        elif self.cover[node] == 1:
+            self.once[node] = span
+            self.twice[node] = children_once
+        else:
+            self.once[node] = children_once
+            self.twice[node] = children_twice
+
+
+def get_overlap_area(rectangles: List[Rectangle]) -> int:
+    # sweep over x; area between two events is the doubly covered y length
+    # times the x distance, so memory never depends on the fabric size
+    events = []
+    for r in rectangles:
+        if r.width > 0 and r.height > 0:
+            events.append((r.x, 1, r.y, r.y + r.height))
+            events.append((r.x + r.width, -1, r.y, r.y + r.height))
+    if not events:
+        return 0
+    events.sort()
+    tree = OverlapSegmentTree(sorted({y for event in events for y in event[2:]}))
+
+    area = 0
+    previous_x = events[0][0]
+    for x, delta, y1, y2 in events:
+        area += tree.twice[1] * (x - previous_x)
+        tree.update(y1, y2, delta)
+        previous_x = x
+    return area
+
+
+def rectangles_overlap(r1: Rectangle, r2: Rectangle) -> bool:
+    # a claim without area covers no square inch, so it overlaps nothing
+    if r1.width * r1.height == 0 or r2.width * r2.height == 0:
+        return False
+    return (r1.x < r2.x + r2.width and r2.x < r1.x + r1.width
+            and r1.y < r2.y + r2.height and r2.y < r1.y + r1.height)
+
+
+class ClaimIndex:
+    # uniform bucket grid sized to the average claim, so each query only
+    # looks at the handful of claims sharing its buckets
+    def __init__(self, rectangles: List[Rectangle]):
+        self.claims: Dict[int, Rectangle] = {r.claim_id: r for r in rectangles}
+        sides = [max(r.width, r.height) for r in rectangles]
+        self.bucket_size = max(1, sum(sides) // max(len(sides), 1))
+        self.buckets: Dict[Tuple[int, int], List[Rectangle]] = {}
+        for r in rectangles:
+            for key in self._bucket_keys(r):
+                self.buckets.setdefault(key, []).append(r)
+
+    def _bucket_keys(self, r: Rectangle) -> List[Tuple[int, int]]:
+        size = self.bucket_size
+        return [(bx, by)
+                for bx in range(r.x // size, (r.x + max(r.width, 1) - 1) // size + 1)
+                for by in range(r.y // size, (r.y + max(r.height, 1) - 1) // size + 1)]
+
+    def overlapping(self, claim_id: int) -> List[int]:
+        rectangle = self.claims[claim_id]
+        partners: Set[int] = set()
+        for key in self._bucket_keys(rectangle):
+            for other in self.buckets.get(key, []):
+                if other.claim_id != claim_id and rectangles_overlap(rectangle, other):
+                    partners.add(other.claim_id)
+        return sorted(partners)
+
+    def intact_claims(self) -> List[int]:
+        return [claim_id for claim_id in self.claims if not self.overlapping(claim_id)]
+
+    def claims_at(self, x: int, y: int) -> List[int]:
+        key = (x // self.bucket_size, y // self.bucket_size)
+        return [r.claim_id for r in self.buckets.get(key, [])
+                if r.x <= x < r.x + r.width and r.y <= y < r.y + r.height]
+
+
+class IncrementalCoverage:
+    # per-inch claim counts plus the xor of the covering claim ids: when a
+    # count drops to one, the xor is exactly the remaining owner, so adding
+    # or removing a claim costs O(area) regardless of how many claims exist
+    def __init__(self):
+        self.counts: Dict[Tuple[int, int], int] = {}
+        self.owners: Dict[Tuple[int, int], int] = {}
+        self.shared: Dict[int, int] = {}
+        self.claims: Dict[int, Rectangle] = {}
+        self.overlap_area = 0
+        self.intact: Set[int] = set()
+
+    def _cells(self, r: Rectangle):
+        for i in range(r.x, r.x + r.width):
+            for j in range(r.y, r.y + r.height):
+                yield i, j
+
+    def _share(self, claim_id: int, delta: int):
+        self.shared[claim_id] += delta
+        if self.shared[claim_id]:
+            self.intact.discard(claim_id)
+        else:
+            self.intact.add(claim_id)
+
+    def add_claim(self, r: Rectangle):
+        # a claim arriving again replaces the live one: the xor owner trick
+        # relies on each id covering a cell at most once
+        if r.claim_id in self.claims:
+            self.remove_claim(r.claim_id)
+        self.claims[r.claim_id] = r
+        self.shared[r.claim_id] = 0
+        self.intact.add(r.claim_id)
+        for cell in self._cells(r):
+            count = self.counts.get(cell, 0)
+            if count == 1:
+                self.overlap_area += 1
+                self._share(self.owners[cell], 1)
+            if count >= 1:
+                self._share(r.claim_id, 1)
+            self.counts[cell] = count + 1
+            self.owners[cell] = self.owners.get(cell, 0) ^ r.claim_id
+
+    def remove_claim(self, claim_id: int):
+        r = self.claims.pop(claim_id)
+        for cell in self._cells(r):
+            count = self.counts[cell] - 1
+            owner = self.owners[cell] ^ claim_id
+            if count == 0:
+                del self.counts[cell]
+                del self.owners[cell]
+                continue
+            self.counts[cell] = count
+            self.owners[cell] = owner
+            if count == 1:
+                self.overlap_area -= 1
+                self._share(owner, -1)
+        del self.shared[claim_id]
+        self.intact.discard(claim_id)
+
+
 rectangles = get_rectangles_from_claims(claims)
-all_cells = []
-for rectangle in rectangles:
-    all_cells += rectangle.get_cells_from_rectangle(rectangle)
-counter = Counter(all_cells)
-print(len([count for count in counter.values() if count >= 2]))
+print(get_overlap_area(rectangles))
+index = ClaimIndex(rectangles)
 
 
 """
@@ -92,11 +292,4 @@ For example, in the claims above, only claim 3 is intact after all claims are ma
 What is the ID of the only claim that doesn't overlap?
 """
 
-all_cells_with_id = []
-for rectangle in rectangles:
-    all_cells_with_id += rectangle.cells
-
-c = Counter(all_cells_with_id)
-# print(c[(281, 665)])
-result = [rectangle for rectangle in rectangles if all(c[cell] == 1 for cell in rectangle.cells)]
-print(result)
\ No newline at end of file
+print(index.intact_claims())
\ No newline at end of file
@@ -49,9 +49,14 @@ While this example listed the entries in chronological order, your entries are i
 What is the ID of the guard you chose multiplied by the minute you chose? (In the above example, the answer would be 10 * 24 = 240.)
 """
 
-from typing import Set, List, Dict, NamedTuple, Tuple
+from typing import Set, List, Dict, NamedTuple, Tuple, Iterable, Iterator, Optional
 from datetime import datetime
 from collections import Counter
+from itertools import accumulate
+from array import array
+from operator import itemgetter
+from bisect import bisect_left, bisect_right
+import heapq
 import re
 
 
@@ -59,10 +64,13 @@ class Nap(NamedTuple):
     guard_id: int
     sleep_minute: int
     wake_minute: int
+    asleep_at: int = 0
+    awake_at: int = 0
 
 
 class Record(NamedTuple):
-    date: Tuple[int, int, int, int, int]
+    # minutes since 0001-01-01 00:00, so records order by this key alone
+    key: int
     content: str
 
 
@@ -87,36 +95,88 @@ TEST_RECORDS = """[1518-11-01 00:00] Guard #10 begins shift
 [1518-11-05 00:45] falls asleep
 [1518-11-05 00:55] wakes up""".split('\n')
 
-def sort_records(records: List[str]) -> List[Record]:
-    sorted_records = []
-    regex = r'\[([0-9]{4})-([0-9]{2})-([0-9]{2}) ([0-9]{2}):([0-9]{2})\] (.*)'
+SHIFT_STARTS = 'G'
+FALLS_ASLEEP = 'f'
+WAKES_UP = 'w'
+
+
+def minute_key(year: int, month: int, day: int, hour: int, minute: int) -> int:
+    return datetime(year, month, day).toordinal() * 1440 + hour * 60 + minute
+
+
+def parse_records(records: Iterable[str]) -> Iterator[Record]:
+    # records start with a fixed-width "[YYYY-MM-DD HH:MM] " prefix, so the
+    # fields are read by offset instead of matching a regex per line
+    day_keys: Dict[str, int] = {}
     for record in records:
-        match = re.match(regex, record)
-        if match is not None:
-            year, month, day, hour, minute, content = match.groups()
-        sorted_records.append(
-            Record((int(year), int(month), int(day), int(hour), int(minute)), content))
-    sorted_records.sort()
-    return sorted_records
+        record = record.strip()
+        if len(record) < 20 or record[0] != '[':
+            continue
+        day = record[1:11]
+        day_key = day_keys.get(day)
+        if day_key is None:
+            day_key = day_keys[day] = minute_key(int(day[0:4]), int(day[5:7]), int(day[8:10]), 0, 0)
+        yield Record(day_key + int(record[12:14]) * 60 + int(record[15:17]), record[19:])
+
+
+def sort_records(records: Iterable[str]) -> List[Record]:
+    # a single int key per record lets timsort compare machine-sized ints
+    # through a C-level itemgetter; a pure-Python radix or counting sort
+    # spends more in its per-record bucket loops than timsort does in total
+    parsed = list(parse_records(records))
+    parsed.sort(key=itemgetter(0))
+    return parsed
+
+
+def shard_is_sorted(path: str) -> bool:
+    # a streaming pass that keeps only the previous key, stopping at the
+    # first record out of order
+    with open(path) as f:
+        previous = None
+        for record in parse_records(f):
+            if previous is not None and record.key < previous:
+                return False
+            previous = record.key
+    return True
+
+
+def read_shard(path: str, presorted: Optional[bool] = None) -> Iterator[Record]:
+    # a sorted shard is streamed line by line; an unsorted one is loaded and
+    # sorted on its own
+    if presorted is None:
+        presorted = shard_is_sorted(path)
+    with open(path) as f:
+        if presorted:
+            yield from parse_records(f)
+        else:
+            yield from sort_records(f)
+
+
+def merge_record_shards(paths: List[str]) -> Iterator[Record]:
+    # every shard's order is checked before the merge yields anything
+    presorted = [shard_is_sorted(path) for path in paths]
+    shards = [read_shard(path, sorted_shard) for path, sorted_shard in zip(paths, presorted)]
+    return heapq.merge(*shards, key=lambda record: record.key)
 
 
 # print(sort_records(records))
 
 
-def get_naps_from_records(records: List[Record]) -> List[Nap]:
-    current_guard_id = sleep_minute = wake_minute = None
+def get_naps_from_records(records: Iterable[Record]) -> List[Nap]:
+    current_guard_id = asleep_at = awake_at = None
     naps: List[Nap] = []
     for record in records:
-        if 'Guard #' in record.content:
+        kind = record.content[:1]
+        if kind == SHIFT_STARTS:
             id = re.search('Guard #([0-9]+).*', record.content).group(1)
             current_guard_id = int(id)
-        if 'falls asleep' in record.content:
-            sleep_minute = record.date[4]
-        if 'wakes up' in record.content:
-            wake_minute = record.date[4]
-        if current_guard_id is not None and sleep_minute is not None and wake_minute is not None:
-            naps.append(Nap(current_guard_id, sleep_minute, wake_minute))
-            sleep_minute = wake_minute = None
+        if kind == FALLS_ASLEEP:
+            asleep_at = record.key
+        if kind == WAKES_UP:
+            awake_at = record.key
+        if current_guard_id is not None and asleep_at is not None and awake_at is not None:
+            naps.append(Nap(current_guard_id, asleep_at % 60, awake_at % 60, asleep_at, awake_at))
+            asleep_at = awake_at = None
     return naps
 
 
@@ -135,10 +195,122 @@ def get_most_common_minute(naps: List[Nap], guard_id: int) -> int:
                 counts[minute] += 1
     return counts.most_common(1)[0][0]
 
+class SleepMatrix(NamedTuple):
+    guard_ids: List[int]
+    minutes: List[array]
+
+
+def build_sleep_matrix(naps: List[Nap]) -> SleepMatrix:
+    # one guards x 60 row per guard, filled from per-row difference arrays
+    rows: Dict[int, array] = {}
+    for nap in naps:
+        row = rows.get(nap.guard_id)
+        if row is None:
+            row = rows[nap.guard_id] = array('i', [0]) * 61
+        row[nap.sleep_minute] += 1
+        row[nap.wake_minute] -= 1
+    guard_ids = list(rows)
+    minutes = [array('i', accumulate(rows[guard_id][:60])) for guard_id in guard_ids]
+    return SleepMatrix(guard_ids, minutes)
+
+
+def strategy_one(matrix: SleepMatrix) -> Tuple[int, int]:
+    totals = [sum(row) for row in matrix.minutes]
+    guard = totals.index(max(totals))
+    row = matrix.minutes[guard]
+    return matrix.guard_ids[guard], row.index(max(row))
+
+
+def strategy_two(matrix: SleepMatrix) -> Tuple[int, int]:
+    peaks = [max(row) for row in matrix.minutes]
+    guard = peaks.index(max(peaks))
+    return matrix.guard_ids[guard], matrix.minutes[guard].index(peaks[guard])
+
+
+def minute_histogram(start: int, end: int) -> List[int]:
+    # how often each minute of the hour occurs in [start, end); whole hours
+    # add to every minute, so this is O(60) however long the interval is
+    hours, rest = divmod(max(end - start, 0), 60)
+    counts = [hours] * 60
+    for time in range(end - rest, end):
+        counts[time % 60] += 1
+    return counts
+
+
+class NapTimeline:
+    # naps ordered by start with prefix sums of their durations and of their
+    # minute-of-hour histograms, so window queries are two bisections plus
+    # clipping the naps cut by the window edges
+    def __init__(self, naps: List[Nap]):
+        naps = sorted(naps, key=lambda nap: nap.asleep_at)
+        self.naps = naps
+        self.starts = [nap.asleep_at for nap in naps]
+        self.ends = [nap.awake_at for nap in naps]
+        self.durations = [0] + list(accumulate(nap.awake_at - nap.asleep_at for nap in naps))
+        self.minutes = array('i', [0]) * (60 * (len(naps) + 1))
+        for i, nap in enumerate(naps):
+            row = 60 * (i + 1)
+            counts = minute_histogram(nap.asleep_at, nap.awake_at)
+            self.minutes[row:row + 60] = array('i', map(sum, zip(self.minutes[row - 60:row], counts)))
+
+    def _window(self, start: int, end: int) -> Tuple[int, int]:
+        # naps of one timeline never overlap, so ends are sorted as well
+        return bisect_right(self.ends, start), bisect_left(self.starts, end)
+
+    def total_sleep(self, start: int, end: int) -> int:
+        first, last = self._window(start, end)
+        if first >= last:
+            return 0
+        total = self.durations[last] - self.durations[first]
+        total -= max(0, start - self.starts[first])
+        total -= max(0, self.ends[last - 1] - end)
+        return total
+
+    def minute_counts(self, start: int, end: int) -> List[int]:
+        first, last = self._window(start, end)
+        if first >= last:
+            return [0] * 60
+        counts = [self.minutes[60 * last + minute] - self.minutes[60 * first + minute] for minute in range(60)]
+        before = minute_histogram(self.starts[first], start)
+        after = minute_histogram(end, self.ends[last - 1])
+        return [count - b - a for count, b, a in zip(counts, before, after)]
+
+
+class SleepIndex:
+    # one guard is on duty at a time, so all naps together form a single
+    # non-overlapping timeline, plus one timeline per guard
+    def __init__(self, naps: List[Nap]):
+        self.timeline = NapTimeline(naps)
+        by_guard: Dict[int, List[Nap]] = {}
+        for nap in naps:
+            by_guard.setdefault(nap.guard_id, []).append(nap)
+        self.guards = {guard_id: NapTimeline(guard_naps) for guard_id, guard_naps in by_guard.items()}
+
+    def asleep_at(self, time: int) -> Optional[int]:
+        i = bisect_right(self.timeline.starts, time) - 1
+        if i >= 0 and time < self.timeline.ends[i]:
+            return self.timeline.naps[i].guard_id
+        return None
+
+    def total_sleep(self, guard_id: int, start: int, end: int) -> int:
+        if guard_id not in self.guards:
+            return 0
+        return self.guards[guard_id].total_sleep(start, end)
+
+    def most_slept_minute(self, start: int, end: int, guard_id: Optional[int] = None) -> Tuple[int, int]:
+        if guard_id is None:
+            counts = self.timeline.minute_counts(start, end)
+        elif guard_id in self.guards:
+            counts = self.guards[guard_id].minute_counts(start, end)
+        else:
+            counts = [0] * 60
+        best = max(counts)
+        return counts.index(best), best
+
+
 def main():
     naps = get_naps_from_records(sort_records(records))
-    guard_id = get_sleepiest_guard(naps)
-    minute = get_most_common_minute(naps, guard_id)
+    guard_id, minute = strategy_one(build_sleep_matrix(naps))
     print(guard_id * minute)
 main()
 
@@ -169,14 +341,7 @@ def get_most_frequent_minute(naps: List[Nap], guard_id: int) -> Tuple[int, int]:
 
 def main2():
     naps = get_naps_from_records(sort_records(records))
-    guards = get_all_guards(naps)
-    minutes = {}
-    for guard in guards:
-        highest = get_most_frequent_minute(naps, guard)
-        minutes[highest] = guard
-    result = sorted(minutes.items(), key = lambda count: count[0][1], reverse = True)[0]
-    minute = result[0][0]
-    guard = result[1]
+    guard, minute = strategy_two(build_sleep_matrix(naps))
     print(minute * guard)
 
 main2()
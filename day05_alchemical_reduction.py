@@ -22,19 +22,202 @@ After all possible reactions, the resulting polymer contains 10 units.
 How many units remain after fully reacting the polymer you scanned? (Note: in this puzzle and others, the input is large; if you copy/paste your input, make sure you get the whole thing.)
 """
 
+from typing import BinaryIO, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+import tempfile
+
 TEST_CASE = 'dabAcCaCBAcCcaDA'
 
+CHUNK_SIZE = 1 << 20
+SPILL_SIZE = 1 << 26
+
+
+def react(polymer: bytes) -> bytes:
+    # units are ASCII letters, and a letter xor 0x20 is the same letter with
+    # the other case, so a single stack pass reduces the whole polymer
+    stack = bytearray()
+    for unit in polymer:
+        if stack and stack[-1] ^ unit == 0x20:
+            stack.pop()
+        else:
+            stack.append(unit)
+    return bytes(stack)
+
 
 def process(polymer: str):
-    polymer = polymer.strip()
-    i = 0
-    while i < len(polymer) -1:
-        if willReact(polymer[i], polymer[i+1]):
-            polymer = polymer.replace(polymer[i] + polymer[i + 1], '')
-            i -= 2    
-        i += 1
-    return len(polymer)
-        
+    return len(react(polymer.strip().encode()))
+
+
+def react_file(path: str, chunk_size: int = CHUNK_SIZE, spill_size: int = SPILL_SIZE, out: Optional[BinaryIO] = None) -> int:
+    # same stack as react, fed chunk by chunk; once the stack grows past
+    # spill_size its bottom part moves to a temp file and is read back in
+    # blocks when the in-memory top is exhausted
+    keep = max(spill_size // 2, 1)
+    stack = bytearray()
+    spilled = 0
+    with open(path, 'rb') as f, tempfile.TemporaryFile() as spill:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            for unit in chunk.translate(None, b' \t\r\n'):
+                if not stack and spilled:
+                    block = min(spilled, keep)
+                    spilled -= block
+                    spill.seek(spilled)
+                    stack = bytearray(spill.read(block))
+                    spill.seek(spilled)
+                    spill.truncate()
+                if stack and stack[-1] ^ unit == 0x20:
+                    stack.pop()
+                else:
+                    stack.append(unit)
+            if len(stack) > spill_size:
+                spill.seek(spilled)
+                spill.write(stack[:-keep])
+                spilled += len(stack) - keep
+                del stack[:-keep]
+        if out is not None:
+            spill.seek(0)
+            for data in iter(lambda: spill.read(chunk_size), b''):
+                out.write(data)
+            out.write(stack)
+        return spilled + len(stack)
+
+
+def merge_residues(left: bytes, right: bytes) -> bytes:
+    # both sides are already reduced, so the only reactions left are the
+    # pairs meeting at the seam
+    cancelled = 0
+    while (cancelled < len(left) and cancelled < len(right)
+           and left[-1 - cancelled] ^ right[cancelled] == 0x20):
+        cancelled += 1
+    return left[:len(left) - cancelled] + right[cancelled:]
+
+
+def react_parallel(polymer: bytes, processes: Optional[int] = None) -> bytes:
+    workers = processes or os.cpu_count() or 1
+    size = max(-(-len(polymer) // workers), 1)
+    pieces = [polymer[i:i + size] for i in range(0, len(polymer), size)] or [b'']
+    with ProcessPoolExecutor(workers) as pool:
+        residues = list(pool.map(react, pieces))
+    while len(residues) > 1:
+        residues = [merge_residues(*residues[i:i + 2]) if i + 1 < len(residues) else residues[i]
+                    for i in range(0, len(residues), 2)]
+    return residues[0]
+
+
+class _PolymerNode:
+    __slots__ = ('unit', 'priority', 'left', 'right', 'size', 'residue')
+
+    def __init__(self, unit: int):
+        self.unit = unit
+        self.priority = random.random()
+        self.left: Optional[_PolymerNode] = None
+        self.right: Optional[_PolymerNode] = None
+        self.size = 1
+        self.residue = bytes([unit])
+
+
+def _size(node: Optional[_PolymerNode]) -> int:
+    return node.size if node is not None else 0
+
+
+def _update(node: _PolymerNode) -> _PolymerNode:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    residue = bytes([node.unit])
+    if node.left is not None:
+        residue = merge_residues(node.left.residue, residue)
+    if node.right is not None:
+        residue = merge_residues(residue, node.right.residue)
+    node.residue = residue
+    return node
+
+
+def _split(node: Optional[_PolymerNode], index: int) -> Tuple[Optional[_PolymerNode], Optional[_PolymerNode]]:
+    if node is None:
+        return None, None
+    if _size(node.left) < index:
+        node.right, right = _split(node.right, index - _size(node.left) - 1)
+        return _update(node), right
+    left, node.left = _split(node.left, index)
+    return left, _update(node)
+
+
+def _join(left: Optional[_PolymerNode], right: Optional[_PolymerNode]) -> Optional[_PolymerNode]:
+    if left is None or right is None:
+        return left if left is not None else right
+    if left.priority > right.priority:
+        left.right = _join(left.right, right)
+        return _update(left)
+    right.left = _join(left, right.left)
+    return _update(right)
+
+
+class EditablePolymer:
+    # implicit treap in which every node keeps the reduced residue of its
+    # span, so an edit only re-merges the O(log n) nodes above it; the
+    # polymer and the units put into it are bytes, like everything react does
+    def __init__(self, polymer: bytes = b''):
+        self.root: Optional[_PolymerNode] = None
+        spine: List[_PolymerNode] = []
+        for unit in polymer:
+            node = _PolymerNode(unit)
+            last = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        if spine:
+            self.root = spine[0]
+            self._rebuild(self.root)
+
+    def _rebuild(self, node: Optional[_PolymerNode]):
+        if node is None:
+            return
+        self._rebuild(node.left)
+        self._rebuild(node.right)
+        _update(node)
+
+    def _check_index(self, index: int, size: int):
+        if not 0 <= index < size:
+            raise IndexError('polymer index out of range')
+
+    def _node(self, unit: bytes) -> _PolymerNode:
+        if len(unit) != 1:
+            raise ValueError('expected a single unit, got {!r}'.format(unit))
+        return _PolymerNode(unit[0])
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    @property
+    def residue(self) -> bytes:
+        return self.root.residue if self.root is not None else b''
+
+    def insert(self, index: int, unit: bytes) -> int:
+        self._check_index(index, len(self) + 1)
+        node = self._node(unit)
+        left, right = _split(self.root, index)
+        self.root = _join(_join(left, node), right)
+        return len(self.residue)
+
+    def delete(self, index: int) -> int:
+        self._check_index(index, len(self))
+        left, right = _split(self.root, index)
+        _, right = _split(right, 1)
+        self.root = _join(left, right)
+        return len(self.residue)
+
+    def replace(self, index: int, unit: bytes) -> int:
+        self._check_index(index, len(self))
+        node = self._node(unit)
+        left, right = _split(self.root, index)
+        _, right = _split(right, 1)
+        self.root = _join(_join(left, node), right)
+        return len(self.residue)
+
 
 def willReact(cur: str, next: str) -> bool:
     if cur.lower() == next.lower() and cur != next:
@@ -43,8 +226,8 @@ def willReact(cur: str, next: str) -> bool:
         return False
 
 
-with open('models/day05.txt') as f:
-    print(process(f.read()))
+if __name__ == '__main__':
+    print(react_file('models/day05.txt'))
 
 """
 Time to improve the polymer.
@@ -66,20 +249,37 @@ lower_cases = [chr(i) for i in range(97,123)]
 
 upper_cases = [chr(i) for i in range(65,91)]
 
-from typing import List
+from typing import Dict
+
+# bytes.translate deletion tables, one per unit type covering both polarities
+DELETE_TABLES = {lower: (lower + upper).encode() for lower, upper in zip(lower_cases, upper_cases)}
 
-def improve_polymer(polymer: str):
-    polymer = polymer.strip()
-    lens: List[int] = []
-    for i in range(26):
-        sample = polymer
-        if lower_cases[i] in polymer or upper_cases[i] in polymer:
-            sample = sample.replace(lower_cases[i], '').replace(upper_cases[i], '')
-            lens.append(process(sample))
-    return min(lens)
+_residue = b''
 
-with open('models/day05.txt') as f:
-    print(improve_polymer(f.read()))
+def _share_residue(residue: bytes):
+    global _residue
+    _residue = residue
 
+def _remove_and_react(unit: str) -> Tuple[str, int]:
+    return unit, len(react(_residue.translate(None, DELETE_TABLES[unit])))
 
+def improve_polymer(polymer: str, processes: Optional[int] = None) -> Dict[str, int]:
+    # removing a unit type commutes with reacting, so every experiment can
+    # start from the already reduced polymer instead of the raw one
+    raw = polymer.strip().encode()
+    residue = react(raw)
+    lens: Dict[str, int] = {}
+    tried: List[str] = []
+    for unit in lower_cases:
+        if any(code in raw for code in DELETE_TABLES[unit]):
+            if any(code in residue for code in DELETE_TABLES[unit]):
+                tried.append(unit)
+            else:
+                lens[unit] = len(residue)
+    with ProcessPoolExecutor(processes, initializer=_share_residue, initargs=(residue,)) as pool:
+        lens.update(pool.map(_remove_and_react, tried))
+    return lens
 
+if __name__ == '__main__':
+    with open('models/day05.txt') as f:
+        print(min(improve_polymer(f.read()).values()))
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Speedup of react_parallel over the sequential react on a replicated day 5 polymer.
+"""
+from time import perf_counter
+import os
+
+from day05_alchemical_reduction import react, react_parallel
+
+REPEAT = 200
+
+
+def benchmark(polymer: bytes):
+    start = perf_counter()
+    expected = react(polymer)
+    sequential = perf_counter() - start
+    print('units: {}  sequential: {:.3f}s'.format(len(polymer), sequential))
+
+    processes = 1
+    while processes <= (os.cpu_count() or 1):
+        start = perf_counter()
+        result = react_parallel(polymer, processes)
+        elapsed = perf_counter() - start
+        assert result == expected
+        print('processes: {:2}  {:.3f}s  speedup: {:.2f}x'.format(processes, elapsed, sequential / elapsed))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    with open('models/day05.txt', 'rb') as f:
+        benchmark(f.read().strip() * REPEAT)
@@ -48,9 +48,10 @@ In this example, the areas of coordinates A, B, C, and F are infinite - while no
 What is the size of the largest area that isn't infinite?
 """
 
-from typing import NamedTuple, List, Set, Dict
+from typing import NamedTuple, List, Dict, Tuple, Iterator, Sequence
 
 from collections import Counter
+from array import array
 
 TEST_CASE = """1, 1
 1, 6
@@ -82,31 +83,26 @@ class Candidate:
     def get_area(self):
         return len(self.locations)
 
-candidates: List[Candidate] = []
-locations: List[Location] = []
-
-def get_original_candidates(locations: List[str]):
-   
+def get_original_candidates(locations: List[str]) -> List[Candidate]:
+    candidates: List[Candidate] = []
     for location in locations:
         x, y = [int(coord) for coord in location.split(', ')]
         candidates.append(Candidate(x, y))
+    return candidates
 
-def get_max_xy(candidates: List[Candidate]) -> Set[int]:
+def get_max_xy(candidates: List[Candidate]) -> Tuple[int, int]:
     xs: List[int] = []
     ys: List[int] = []
-    ret = set()
     for candidate in candidates:
         xs.append(candidate.x)
         ys.append(candidate.y)
-    ret.add(max(xs))
-    ret.add(max(ys))
-    print('max_x max_y: ', ret)
-    return ret
+    print('max_x max_y: ', max(xs), max(ys))
+    return max(xs), max(ys)
 
-def get_all_locations(max_x: int, max_y: int):
+def get_all_locations(max_x: int, max_y: int) -> Iterator[Location]:
     for x in range(-1, max_x + 20):
         for y in range(-1, max_y + 20):
-            locations.append(Location(x, y))
+            yield Location(x, y)
 
 def calculate_manhattan_distance(l1: Location, l2: Candidate) -> int:
     return abs(l1.x - l2.x) + abs(l1.y - l2.y)
@@ -127,10 +123,74 @@ def set_locations_to_candidate(locations: List[Location], candidates: List[Candi
     return sorted(areas)
 
 
+TIE = -1
+UNCLAIMED = -2
+
+
+class LabelGrid(NamedTuple):
+    min_x: int
+    min_y: int
+    width: int
+    height: int
+    labels: array
+
+
+def label_locations(xs: Sequence[int], ys: Sequence[int]) -> LabelGrid:
+    # simultaneous BFS from every candidate over the bounding box; without
+    # obstacles BFS depth is the Manhattan distance, and a cell reached in
+    # the same round from two different labels (or from a tie) is a tie
+    min_x, min_y = min(xs), min(ys)
+    width = max(xs) - min_x + 1
+    height = max(ys) - min_y + 1
+    labels = array('i', [UNCLAIMED]) * (width * height)
+
+    frontier: Dict[int, int] = {}
+    for label, (x, y) in enumerate(zip(xs, ys)):
+        index = (y - min_y) * width + x - min_x
+        frontier[index] = TIE if index in frontier else label
+    while frontier:
+        for index, label in frontier.items():
+            labels[index] = label
+        proposals: Dict[int, int] = {}
+        for index, label in frontier.items():
+            x = index % width
+            neighbors = []
+            if x > 0:
+                neighbors.append(index - 1)
+            if x < width - 1:
+                neighbors.append(index + 1)
+            if index >= width:
+                neighbors.append(index - width)
+            if index < width * (height - 1):
+                neighbors.append(index + width)
+            for neighbor in neighbors:
+                if labels[neighbor] != UNCLAIMED:
+                    continue
+                if proposals.get(neighbor, label) != label:
+                    proposals[neighbor] = TIE
+                else:
+                    proposals[neighbor] = label
+        frontier = proposals
+    return LabelGrid(min_x, min_y, width, height, labels)
+
+
+def get_areas(xs: Sequence[int], ys: Sequence[int]) -> Tuple[List[int], List[bool]]:
+    grid = label_locations(xs, ys)
+    counts = Counter(grid.labels)
+    areas = [counts[label] for label in range(len(xs))]
+
+    # a region touching the bounding box keeps growing outside of it
+    labels, width = grid.labels, grid.width
+    border = set(labels[:width]) | set(labels[-width:])
+    border |= set(labels[::width]) | set(labels[width - 1::width])
+    infinite = [label in border for label in range(len(xs))]
+    return areas, infinite
+
+
 # with open('models/day06.txt') as f:
-#     get_original_candidates(f.readlines())
+#     candidates = get_original_candidates(f.readlines())
 #     max_x, max_y = get_max_xy(candidates)
-#     get_all_locations(max_x, max_y)
+#     locations = list(get_all_locations(max_x, max_y))
 
 #     print(set_locations_to_candidate(locations, candidates))
     
@@ -177,9 +237,146 @@ def find_region(locations: List[Location], candidates: List[Candidate]) -> List[
             region.append(location)
     return region
 
-with open('models/day06.txt') as f:
-    get_original_candidates(f.readlines())
-    max_x, max_y = get_max_xy(candidates)
-    get_all_locations(max_x, max_y)
-
-    print(len(find_region(locations, candidates)))
\ No newline at end of file
+def distance_profile(coords: Sequence[int], budget: int) -> List[int]:
+    # sum of |v - c| over coords for every integer v where it stays below
+    # budget; the sum changes by (#coords <= v) - (#coords > v) per step and
+    # by len(coords) per step outside the coordinate range
+    coords = sorted(coords)
+    n = len(coords)
+    low, high = coords[0], coords[-1]
+    total = sum(c - low for c in coords)
+    inside: List[int] = []
+    below = 0
+    for v in range(low, high + 1):
+        inside.append(total)
+        while below < n and coords[below] <= v:
+            below += 1
+        total += below - (n - below)
+
+    profile = [total for total in inside if total < budget]
+    for edge in (inside[0], inside[-1]):
+        total = edge + n
+        while total < budget:
+            profile.append(total)
+            total += n
+    return profile
+
+
+def min_distance_sum(coords: Sequence[int]) -> int:
+    median = sorted(coords)[len(coords) // 2]
+    return sum(abs(c - median) for c in coords)
+
+
+def region_size(xs: Sequence[int], ys: Sequence[int], limit: int) -> int:
+    # total distance is the x profile plus the y profile, so the region size
+    # is the number of (x, y) profile pairs adding up to less than limit
+    x_budget = limit - min_distance_sum(ys)
+    y_budget = limit - min_distance_sum(xs)
+    x_profile = sorted(distance_profile(xs, x_budget))
+    y_profile = sorted(distance_profile(ys, y_budget))
+
+    count = 0
+    j = len(y_profile) - 1
+    for x_total in x_profile:
+        while j >= 0 and x_total + y_profile[j] >= limit:
+            j -= 1
+        if j < 0:
+            break
+        count += j + 1
+    return count
+
+
+class NearestCandidateIndex:
+    # rotating by 45 degrees (u = x + y, v = x - y) turns the Manhattan
+    # distance into max(|du|, |dv|); the rotated points are kept as an
+    # implicit KD-tree, where each subtree is a slice of self.order with its
+    # splitting point in the middle
+    def __init__(self, xs: Sequence[int], ys: Sequence[int]):
+        self.us = array('i', [x + y for x, y in zip(xs, ys)])
+        self.vs = array('i', [x - y for x, y in zip(xs, ys)])
+        self.order = array('i', range(len(self.us)))
+        self._build(0, len(self.order), 0)
+
+    def _build(self, lo: int, hi: int, depth: int):
+        if hi - lo <= 1:
+            return
+        keys = self.us if depth % 2 == 0 else self.vs
+        self.order[lo:hi] = array('i', sorted(self.order[lo:hi], key=keys.__getitem__))
+        mid = (lo + hi) // 2
+        self._build(lo, mid, depth + 1)
+        self._build(mid + 1, hi, depth + 1)
+
+    def nearest(self, x: int, y: int) -> int:
+        u, v = x + y, x - y
+        us, vs, order = self.us, self.vs, self.order
+        best = None
+        owner = TIE
+        stack = [(0, len(order), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            label = order[mid]
+            distance = max(abs(u - us[label]), abs(v - vs[label]))
+            if best is None or distance < best:
+                best, owner = distance, label
+            elif distance == best:
+                owner = TIE
+            diff = u - us[label] if depth % 2 == 0 else v - vs[label]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # the far side is at least |diff| away; equal distances are
+            # still visited so that ties are found
+            if best is None or abs(diff) <= best:
+                stack.append((far[0], far[1], depth + 1))
+            stack.append((near[0], near[1], depth + 1))
+        return owner
+
+    def nearest_many(self, xs: Sequence[int], ys: Sequence[int]) -> array:
+        return array('i', [self.nearest(x, y) for x, y in zip(xs, ys)])
+
+
+class ChronalGrid:
+    # candidate coordinates as int32 arrays; every query is computed from
+    # them alone, so separate grids can be used from threads or processes
+    def __init__(self, xs: Sequence[int], ys: Sequence[int]):
+        self.xs = array('i', xs)
+        self.ys = array('i', ys)
+
+    @classmethod
+    def from_lines(cls, lines: List[str]) -> 'ChronalGrid':
+        candidates = get_original_candidates([line for line in lines if line.strip()])
+        return cls([c.x for c in candidates], [c.y for c in candidates])
+
+    def candidates(self) -> List[Candidate]:
+        return [Candidate(x, y) for x, y in zip(self.xs, self.ys)]
+
+    def bounds(self) -> Tuple[range, range]:
+        return range(min(self.xs), max(self.xs) + 1), range(min(self.ys), max(self.ys) + 1)
+
+    def locations(self) -> Iterator[Location]:
+        x_range, y_range = self.bounds()
+        for y in y_range:
+            for x in x_range:
+                yield Location(x, y)
+
+    def areas(self) -> Tuple[List[int], List[bool]]:
+        return get_areas(self.xs, self.ys)
+
+    def largest_finite_area(self) -> int:
+        areas, infinite = self.areas()
+        return max(area for area, unbounded in zip(areas, infinite) if not unbounded)
+
+    def region_size(self, limit: int) -> int:
+        return region_size(self.xs, self.ys, limit)
+
+    def nearest_index(self) -> NearestCandidateIndex:
+        return NearestCandidateIndex(self.xs, self.ys)
+
+
+if __name__ == '__main__':
+    with open('models/day06.txt') as f:
+        grid = ChronalGrid.from_lines(f.readlines())
+
+    print(grid.largest_finite_area())
+    print(grid.region_size(10000))
@@ -0,0 +1,25 @@
+import random
+
+from day01b_chronal_calibration import IncrementalCalibrator, solve_first_repeat
+
+
+def test_total_returning_to_bucket_total():
+    calibrator = IncrementalCalibrator([-5, -4, 3])
+    calibrator.first_repeat
+    calibrator.append([-1])
+    calibrator.append([4, -3])
+    assert calibrator.first_repeat == solve_first_repeat([-5, -4, 3, -1, 4, -3])
+
+
+def test_random_appends_match_solve_first_repeat():
+    rng = random.Random(2018)
+    for _ in range(5000):
+        changes = [rng.randint(-6, 6) for _ in range(rng.randint(0, 4))]
+        calibrator = IncrementalCalibrator(changes)
+        for _ in range(rng.randint(1, 6)):
+            if rng.random() < 0.5:
+                assert calibrator.first_repeat == solve_first_repeat(changes)
+            batch = [rng.randint(-6, 6) for _ in range(rng.randint(0, 3))]
+            changes.extend(batch)
+            calibrator.append(batch)
+        assert calibrator.first_repeat == solve_first_repeat(changes)